@@ -12,7 +12,9 @@ class Settings(BaseSettings):
     openai_model: str = "gpt-5-nano"
 
     # Embedding Configuration
-    embedding_model: str = "text-embedding-ada-002"
+    # Models prefixed with "fastembed:" run locally via ONNX (batched CPU
+    # inference); other names are passed to the OpenAI embeddings API.
+    embedding_model: str = "fastembed:BAAI/bge-small-en-v1.5"
 
     # Chunking Configuration
     chunk_size: int = 1000
@@ -21,11 +23,22 @@ class Settings(BaseSettings):
     # Retrieval Configuration
     retrieval_k: int = 4
 
+    # Answer cache (entries; keyed by normalized question)
+    answer_cache_size: int = 128
+
     # Paths
     vector_store_path: str = "./vector_store"
     documents_path: str = "./documents"
+    embedding_cache_path: str = "./embedding_cache.db"
 
     # API Configuration
+    # Worker processes for the built-in uvicorn runner. Defaults to 1
+    # because the index and answer/query caches are per-process state
+    # with no cross-worker invalidation: with N workers, /upload and
+    # /rebuild only update the worker that served them and the others
+    # keep answering from the stale index until restarted. Raise this
+    # only for read-only deployments that never upload or rebuild.
+    uvicorn_workers: int = 1
     api_title: str = "RAG Question Answering API"
     api_version: str = "1.0.0"
     api_description: str = "A retrieval-augmented generation API for document-based question answering"
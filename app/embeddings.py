@@ -0,0 +1,239 @@
+"""Embedding backends for the RAG pipeline."""
+
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from app.config import settings
+from app.logger import logger
+
+# Models prefixed with this run locally via fastembed instead of the OpenAI API
+FASTEMBED_PREFIX = "fastembed:"
+
+
+class FastEmbedEmbeddings(Embeddings):
+    """
+    LangChain embeddings wrapper around a local fastembed (ONNX) model.
+
+    Embedding runs as batched in-process CPU inference instead of one
+    HTTP roundtrip per document, which makes ingest orders of magnitude
+    faster and removes the per-token API cost.
+    """
+
+    def __init__(self, model_name: str = "BAAI/bge-small-en-v1.5", batch_size: int = 64):
+        """
+        Initialize the local embedding model.
+
+        Args:
+            model_name: fastembed model identifier
+            batch_size: Number of texts embedded per inference batch
+        """
+        from fastembed import TextEmbedding
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = TextEmbedding(model_name)
+
+        logger.info("Loaded local embedding model: %s", model_name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a batch of documents.
+
+        Args:
+            texts: List of texts to embed
+
+        Returns:
+            List of embedding vectors
+        """
+        vectors = np.asarray(
+            list(self._model.embed(texts, batch_size=self.batch_size)),
+            dtype=np.float32
+        )
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a single query string.
+
+        Args:
+            text: Query text to embed
+
+        Returns:
+            Embedding vector
+        """
+        return self.embed_documents([text])[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Content-hash embedding cache backed by a single SQLite file.
+
+    Each chunk's text is hashed and looked up before embedding, so
+    rebuilds and repeated uploads only pay for chunks whose content
+    actually changed. Vectors are stored as float16 bytes to halve
+    cache size and read bandwidth, and widened back to float32 on
+    the way out.
+    """
+
+    def __init__(self, embeddings: Embeddings, namespace: str = "", cache_path: str = None):
+        """
+        Wrap an embeddings backend with a persistent cache.
+
+        Args:
+            embeddings: Underlying embeddings backend
+            namespace: Mixed into cache keys so different embedding
+                models never share vectors
+            cache_path: Path to the SQLite cache file
+        """
+        if cache_path is None:
+            cache_path = settings.embedding_cache_path
+
+        self.embeddings = embeddings
+        self.namespace = namespace
+        self._query_cache: OrderedDict = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS emb (key TEXT PRIMARY KEY, vec BLOB)"
+        )
+        self._conn.commit()
+
+        logger.info("Embedding cache opened: %s", cache_path)
+
+    # Bumped whenever the stored vector format changes (v2 = float16),
+    # so stale entries written in an older format are never decoded
+    CACHE_FORMAT = "v2"
+
+    # Recent query embeddings kept in memory; sized for a working set
+    # of hot questions, not the whole corpus
+    QUERY_CACHE_SIZE = 256
+
+    # Keys looked up per SELECT; SQLite caps bound parameters at 999
+    # on older builds, so stay under that
+    SELECT_BATCH_SIZE = 900
+
+    def _key(self, text: str) -> str:
+        """Content hash used as cache key for a chunk of text."""
+        payload = f"{self.CACHE_FORMAT}\x00{self.namespace}\x00{text}".encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed documents, serving cache hits from SQLite.
+
+        Only texts missing from the cache are sent to the underlying
+        model; their vectors are written back for future calls.
+
+        Args:
+            texts: List of texts to embed
+
+        Returns:
+            List of embedding vectors
+        """
+        keys = [self._key(text) for text in texts]
+
+        unique_keys = list(set(keys))
+        rows = []
+        with self._lock:
+            for start in range(0, len(unique_keys), self.SELECT_BATCH_SIZE):
+                batch = unique_keys[start:start + self.SELECT_BATCH_SIZE]
+                placeholders = ",".join("?" for _ in batch)
+                rows.extend(self._conn.execute(
+                    f"SELECT key, vec FROM emb WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall())
+
+        cached = {
+            key: np.frombuffer(blob, dtype=np.float16).astype(np.float32).tolist()
+            for key, blob in rows
+        }
+
+        miss_indices = [i for i, key in enumerate(keys) if key not in cached]
+
+        if miss_indices:
+            new_vectors = self.embeddings.embed_documents(
+                [texts[i] for i in miss_indices]
+            )
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO emb (key, vec) VALUES (?, ?)",
+                    [
+                        (keys[i], np.asarray(vec, dtype=np.float16).tobytes())
+                        for i, vec in zip(miss_indices, new_vectors)
+                    ]
+                )
+                self._conn.commit()
+            for i, vec in zip(miss_indices, new_vectors):
+                cached[keys[i]] = list(vec)
+
+        logger.info(
+            "Embedded %d texts (%d cache hits)",
+            len(texts), len(texts) - len(miss_indices)
+        )
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a single query string, with an in-memory LRU.
+
+        Queries skip the SQLite layer (they would bloat it with
+        one-off entries) but recent ones are kept in a small LRU, so
+        asking the same question again - or retrieving with a
+        different k - doesn't re-run the model.
+
+        Args:
+            text: Query text to embed
+
+        Returns:
+            Embedding vector
+        """
+        key = self._key(text)
+
+        with self._query_cache_lock:
+            if key in self._query_cache:
+                self._query_cache.move_to_end(key)
+                return self._query_cache[key]
+
+        vector = self.embeddings.embed_query(text)
+
+        with self._query_cache_lock:
+            self._query_cache[key] = vector
+            self._query_cache.move_to_end(key)
+            while len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+
+        return vector
+
+
+def get_embeddings() -> Embeddings:
+    """
+    Create the embeddings backend selected by settings.embedding_model.
+
+    Model names prefixed with "fastembed:" are served by a local ONNX
+    model; anything else is treated as an OpenAI embedding model.
+
+    Returns:
+        Configured embeddings instance
+    """
+    model = settings.embedding_model
+
+    if model.startswith(FASTEMBED_PREFIX):
+        embeddings = FastEmbedEmbeddings(model_name=model[len(FASTEMBED_PREFIX):])
+    else:
+        embeddings = OpenAIEmbeddings(
+            openai_api_key=settings.openai_api_key,
+            model=model
+        )
+
+    return CachedEmbeddings(embeddings, namespace=model)
@@ -1,15 +1,31 @@
 """Logging configuration for the RAG API."""
 
+import atexit
 import logging
+import queue
 import sys
+import threading
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
 from pathlib import Path
 from datetime import datetime
 
+# Records buffered before the file handler is flushed; errors flush
+# immediately so nothing important sits in the buffer during a crash
+LOG_BUFFER_CAPACITY = 256
+
+# Seconds between periodic buffer flushes, so low-traffic servers
+# still hit disk regularly and a hard kill loses at most this window
+LOG_FLUSH_INTERVAL = 30.0
+
 
 def setup_logger(name: str = "rag_api") -> logging.Logger:
     """
     Set up and configure logger with file and console handlers.
 
+    Log records are handed off to a background listener thread through
+    a queue, so request threads never block on I/O, and file writes go
+    through a memory buffer to batch syscalls under load.
+
     Args:
         name: Logger name
 
@@ -39,20 +55,53 @@ def setup_logger(name: str = "rag_api") -> logging.Logger:
         datefmt='%H:%M:%S'
     )
 
-    # File handler - detailed logs
+    # File handler - detailed logs, buffered to batch disk writes
     log_file = log_dir / f"rag_api_{datetime.now().strftime('%Y%m%d')}.log"
     file_handler = logging.FileHandler(log_file)
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(detailed_formatter)
 
+    buffered_file_handler = MemoryHandler(
+        capacity=LOG_BUFFER_CAPACITY,
+        flushLevel=logging.ERROR,
+        target=file_handler
+    )
+
     # Console handler - simpler logs
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(simple_formatter)
 
-    # Add handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Route records through a queue; the listener thread does the
+    # actual formatting and I/O off the request path
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(
+        log_queue,
+        buffered_file_handler,
+        console_handler,
+        respect_handler_level=True
+    )
+    listener.start()
+
+    logger.addHandler(QueueHandler(log_queue))
+
+    # Flush the buffer on a fixed interval; capacity/ERROR flushes
+    # alone would leave a quiet server's records in RAM indefinitely
+    def _periodic_flush():
+        buffered_file_handler.flush()
+        timer = threading.Timer(LOG_FLUSH_INTERVAL, _periodic_flush)
+        timer.daemon = True
+        timer.start()
+
+    flush_timer = threading.Timer(LOG_FLUSH_INTERVAL, _periodic_flush)
+    flush_timer.daemon = True
+    flush_timer.start()
+
+    def _shutdown():
+        listener.stop()
+        buffered_file_handler.flush()
+
+    atexit.register(_shutdown)
 
     return logger
 
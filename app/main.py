@@ -1,20 +1,31 @@
 """FastAPI application for RAG-based Question Answering."""
 
+import asyncio
 import os
-import shutil
 from pathlib import Path
 from typing import List
 from contextlib import asynccontextmanager
 
+import aiofiles
+import orjson
+
 from fastapi import FastAPI, HTTPException, UploadFile, File, status
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response, StreamingResponse
 
 from app.config import settings
 from app.logger import logger
 from app.models import QuestionRequest, QuestionResponse, UploadResponse, HealthResponse
 from app.rag_pipeline import rag_pipeline
 
+# Chunk size for streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Pre-bound encoder for the per-token streaming path; orjson returns
+# bytes, which StreamingResponse sends without re-encoding
+_dumps = orjson.dumps
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -30,13 +41,15 @@ async def lifespan(app: FastAPI):
         rag_pipeline.initialize_vector_store()
         logger.info("Vector store initialized successfully")
     except Exception as e:
-        logger.error(f"Failed to initialize vector store: {e}")
+        logger.error("Failed to initialize vector store: %s", e)
         raise
 
     yield
 
-    # Shutdown
+    # Shutdown; persist any debounced save still in its window so
+    # acknowledged uploads survive the restart
     logger.info("Shutting down RAG API...")
+    rag_pipeline.flush_pending_save()
 
 
 # Create FastAPI app
@@ -66,6 +79,7 @@ async def root():
         "description": settings.api_description,
         "endpoints": {
             "POST /ask": "Ask a question based on indexed documents",
+            "POST /ask/stream": "Ask a question and stream the answer as server-sent events",
             "POST /upload": "Upload new documents to the knowledge base",
             "GET /health": "Check API health status",
             "POST /rebuild": "Rebuild the vector store from scratch"
@@ -98,12 +112,14 @@ async def health_check():
 
 
 @app.post("/ask", response_model=QuestionResponse)
-async def ask_question(request: QuestionRequest):
+async def ask_question(request: QuestionRequest, nocache: bool = False):
     """
     Ask a question based on the indexed documents.
 
     Args:
         request: Question request containing the question
+        nocache: Query parameter; pass ?nocache=1 to bypass the
+            answer cache and force a fresh answer
 
     Returns:
         Answer with source documents
@@ -112,10 +128,13 @@ async def ask_question(request: QuestionRequest):
         HTTPException: If an error occurs during question answering
     """
     try:
-        logger.info(f"Received question: {request.question}")
+        logger.info("Received question: %s", request.question)
 
-        # Get answer from RAG pipeline
-        result = rag_pipeline.ask(request.question)
+        # Get answer from RAG pipeline; the chain call blocks on the
+        # LLM, so run it in a worker thread to keep the event loop free
+        result = await run_in_threadpool(
+            rag_pipeline.ask, request.question, use_cache=not nocache
+        )
 
         # Create highlighted answer (bonus feature)
         highlighted_answer = rag_pipeline.highlight_context(
@@ -129,18 +148,46 @@ async def ask_question(request: QuestionRequest):
             highlighted_answer=highlighted_answer if highlighted_answer != result["answer"] else None
         )
 
-        logger.info(f"Successfully answered question with {len(result['sources'])} sources")
+        logger.info("Successfully answered question with %d sources", len(result['sources']))
 
         return response
 
     except Exception as e:
-        logger.error(f"Error answering question: {e}", exc_info=True)
+        logger.error("Error answering question: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while processing your question: {str(e)}"
         )
 
 
+@app.post("/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+    """
+    Ask a question and stream the answer as server-sent events.
+
+    Emits a sources event after retrieval, then one token event per
+    LLM token, so clients can render the answer as it is generated.
+
+    Args:
+        request: Question request containing the question
+
+    Returns:
+        Server-sent event stream of sources, token and done events
+    """
+    logger.info("Received streaming question: %s", request.question)
+
+    async def event_stream():
+        try:
+            events = rag_pipeline.ask_stream(request.question)
+            async for event in iterate_in_threadpool(events):
+                yield b"data: " + _dumps(event) + b"\n\n"
+        except Exception as e:
+            logger.error("Error streaming answer: %s", e, exc_info=True)
+            yield b"data: " + _dumps({"type": "error", "detail": str(e)}) + b"\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @app.post("/upload", response_model=UploadResponse)
 async def upload_documents(files: List[UploadFile] = File(...)):
     """
@@ -156,30 +203,39 @@ async def upload_documents(files: List[UploadFile] = File(...)):
         HTTPException: If upload fails or invalid file type
     """
     try:
-        uploaded_files = []
         documents_path = Path(settings.documents_path)
         documents_path.mkdir(parents=True, exist_ok=True)
 
-        # Save uploaded files
+        # Validate every extension before any I/O, so a bad filename
+        # rejects the batch without leaving earlier files on disk
         for file in files:
-            # Validate file extension
             if not file.filename.endswith(('.txt', '.md')):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Invalid file type: {file.filename}. Only .txt and .md files are allowed."
                 )
 
-            # Save file
+        async def save_file(file: UploadFile) -> str:
+            # Stream to disk in bounded chunks without blocking the
+            # event loop or buffering the whole upload in memory
             file_path = documents_path / file.filename
 
-            with open(file_path, "wb") as f:
-                shutil.copyfileobj(file.file, f)
+            async with aiofiles.open(file_path, "wb") as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
+
+            logger.info("Uploaded file: %s", file.filename)
+            return str(file_path)
 
-            uploaded_files.append(str(file_path))
-            logger.info(f"Uploaded file: {file.filename}")
+        uploaded_files = list(await asyncio.gather(
+            *(save_file(file) for file in files)
+        ))
 
-        # Add documents to vector store
-        rag_pipeline.add_documents(uploaded_files)
+        # Add all documents in one batched call; persisting the index
+        # is deferred to a debounced save that coalesces bursts of
+        # uploads into a single disk write
+        await run_in_threadpool(rag_pipeline.add_documents, uploaded_files, save=False)
+        rag_pipeline.schedule_save()
 
         total_docs = rag_pipeline.vector_store.index.ntotal
 
@@ -192,7 +248,7 @@ async def upload_documents(files: List[UploadFile] = File(...)):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error uploading documents: {e}", exc_info=True)
+        logger.error("Error uploading documents: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while uploading documents: {str(e)}"
@@ -215,7 +271,9 @@ async def rebuild_vector_store():
     try:
         logger.info("Rebuilding vector store...")
 
-        rag_pipeline.initialize_vector_store(force_rebuild=True)
+        # Full load + embed + index build is the heaviest blocking
+        # call in the app; keep it off the event loop
+        await run_in_threadpool(rag_pipeline.initialize_vector_store, force_rebuild=True)
 
         total_docs = rag_pipeline.vector_store.index.ntotal
 
@@ -225,7 +283,7 @@ async def rebuild_vector_store():
         }
 
     except Exception as e:
-        logger.error(f"Error rebuilding vector store: {e}", exc_info=True)
+        logger.error("Error rebuilding vector store: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while rebuilding vector store: {str(e)}"
@@ -244,14 +302,15 @@ async def global_exception_handler(request, exc):
     Returns:
         JSON error response
     """
-    logger.error(f"Unhandled exception: {exc}", exc_info=True)
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
 
-    return JSONResponse(
-        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content={
+    return Response(
+        content=_dumps({
             "detail": "An internal server error occurred",
             "error": str(exc)
-        }
+        }),
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        media_type="application/json"
     )
 
 
@@ -262,6 +321,8 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        workers=settings.uvicorn_workers,
+        loop="uvloop",
+        http="httptools",
         log_level="info"
     )
@@ -1,21 +1,60 @@
 """RAG Pipeline implementation using LangChain and FAISS."""
 
+import fcntl
+import hashlib
+import itertools
+import logging
+import math
 import os
+import pickle
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Iterator, List, Dict, Any, Optional
+from uuid import uuid4
 
+import ahocorasick
+import faiss
+import numpy as np
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
+from langchain_community.document_loaders import TextLoader
 from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_openai import ChatOpenAI
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
 from langchain.schema import Document
 
 from app.config import settings
+from app.docstore import ArrowDocstore
+from app.embeddings import get_embeddings
 from app.logger import logger
 
+# Sentence boundary pattern used when splitting contexts for highlighting,
+# compiled once at import instead of on every request
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Prompt shared by the blocking QA chain and the streaming path
+_QA_PROMPT = PromptTemplate(
+    template="""You are a helpful AI assistant answering questions based on the provided context.
+
+Use the following pieces of context to answer the question at the end. If you don't know the answer based on the context, just say that you don't know. Don't try to make up an answer.
+
+When answering:
+1. Be specific and cite relevant information from the context
+2. Keep your answer concise but complete
+3. If the context mentions specific policies, prices, or procedures, include them in your answer
+
+Context:
+{context}
+
+Question: {question}
+
+Answer:""",
+    input_variables=["context", "question"]
+)
+
 
 class RAGPipeline:
     """
@@ -27,10 +66,8 @@ class RAGPipeline:
 
     def __init__(self):
         """Initialize the RAG pipeline."""
-        self.embeddings = OpenAIEmbeddings(
-            openai_api_key=settings.openai_api_key,
-            model=settings.embedding_model
-        )
+        self.embeddings = get_embeddings()
+        self.vector_store_path = self._resolve_vector_store_path()
         self.llm = ChatOpenAI(
             openai_api_key=settings.openai_api_key,
             model_name=settings.openai_model,
@@ -38,9 +75,43 @@ class RAGPipeline:
         )
         self.vector_store: Optional[FAISS] = None
         self.qa_chain: Optional[RetrievalQA] = None
+        self._automaton_cache = None
+        self._answer_cache: OrderedDict = OrderedDict()
+        self._answer_cache_lock = threading.Lock()
+
+        # Hot/cold index tiering (see _attach_hot_tier); only active
+        # when the cold index is IVFPQ
+        self._cold_index: Optional[faiss.Index] = None
+        # Owning SWIG wrapper behind _cold_index; downcast_index
+        # returns a non-owning view, so this reference is what keeps
+        # the cold index alive
+        self._cold_index_owner: Optional[faiss.Index] = None
+        self._hot_index: Optional[faiss.Index] = None
+        self._shards_index: Optional[faiss.IndexShards] = None
+        self._loaded_via_mmap = False
+
+        # Serializes index mutation (saves, hot-tier adds) and
+        # coalesces deferred saves from bursts of uploads
+        self._save_lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_timer_lock = threading.Lock()
 
         logger.info("RAG Pipeline initialized")
 
+    def _resolve_vector_store_path(self) -> str:
+        """
+        Derive the on-disk vector store path from the embedding model.
+
+        Different embedding models produce vectors of different
+        dimensions, so each model gets its own index directory to avoid
+        loading an incompatible index.
+
+        Returns:
+            Vector store path suffixed with the embedding model name
+        """
+        model_slug = re.sub(r"\W+", "_", settings.embedding_model).strip("_")
+        return f"{settings.vector_store_path}_{model_slug}"
+
     def load_documents(self, documents_path: str = None) -> List[Document]:
         """
         Load documents from the specified directory.
@@ -59,42 +130,59 @@ class RAGPipeline:
         if not documents_path.exists():
             raise ValueError(f"Documents path does not exist: {documents_path}")
 
-        logger.info(f"Loading documents from: {documents_path}")
+        logger.info("Loading documents from: %s", documents_path)
 
-        # Load .txt files
-        txt_loader = DirectoryLoader(
-            str(documents_path),
-            glob="**/*.txt",
-            loader_cls=TextLoader,
-            loader_kwargs={"encoding": "utf-8"}
+        # Glob once, then load files concurrently
+        paths = sorted(
+            itertools.chain(
+                documents_path.rglob("*.txt"),
+                documents_path.rglob("*.md")
+            )
         )
 
-        # Load .md files
-        md_loader = DirectoryLoader(
-            str(documents_path),
-            glob="**/*.md",
-            loader_cls=TextLoader,
-            loader_kwargs={"encoding": "utf-8"}
-        )
+        all_docs = self._load_files(paths)
+
+        logger.info("Loaded %d documents", len(all_docs))
 
-        txt_docs = txt_loader.load()
-        md_docs = md_loader.load()
+        return all_docs
 
-        all_docs = txt_docs + md_docs
+    @staticmethod
+    def _load_files(paths: List) -> List[Document]:
+        """
+        Load text files concurrently with a thread pool.
 
-        logger.info(f"Loaded {len(all_docs)} documents")
+        The per-file work is stat + read + UTF-8 decode, all of which
+        release the GIL, so threads are sufficient.
 
-        return all_docs
+        Args:
+            paths: File paths (str or Path) to load
+
+        Returns:
+            List of loaded documents in input order
+        """
+        def load_file(path) -> List[Document]:
+            return TextLoader(str(path), encoding="utf-8").load()
+
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(itertools.chain.from_iterable(
+                executor.map(load_file, paths)
+            ))
 
     def split_documents(self, documents: List[Document]) -> List[Document]:
         """
         Split documents into chunks for embedding.
 
+        Chunks with identical content are dropped (keeping the first
+        occurrence) so duplicated text is never embedded or indexed
+        more than once; the dropped copies' source files are merged
+        into the kept chunk's metadata so citations stay complete.
+
         Args:
             documents: List of documents to split
 
         Returns:
-            List of document chunks
+            List of deduplicated document chunks
         """
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=settings.chunk_size,
@@ -105,14 +193,84 @@ class RAGPipeline:
 
         chunks = text_splitter.split_documents(documents)
 
-        logger.info(f"Split into {len(chunks)} chunks")
+        seen: Dict[bytes, Document] = {}
+        unique_chunks = []
+        for chunk in chunks:
+            content_hash = hashlib.blake2b(
+                chunk.page_content.encode("utf-8"), digest_size=16
+            ).digest()
+            kept = seen.get(content_hash)
+            if kept is not None:
+                # Record the duplicate's origin on the kept chunk so
+                # answers can still cite every file it appeared in
+                source = chunk.metadata.get("source")
+                if source and source != kept.metadata.get("source"):
+                    sources = kept.metadata.setdefault("sources", [])
+                    if source not in sources:
+                        sources.append(source)
+                continue
+            seen[content_hash] = chunk
+            unique_chunks.append(chunk)
+
+        logger.info(
+            "Split into %d chunks (%d duplicates dropped)",
+            len(unique_chunks), len(chunks) - len(unique_chunks)
+        )
+
+        return unique_chunks
+
+    # Below this many vectors an IVFPQ index cannot be trained reliably,
+    # so small corpora fall back to an exact flat index.
+    MIN_IVFPQ_VECTORS = 10_000
 
-        return chunks
+    def _build_index(self, vectors: np.ndarray) -> faiss.Index:
+        """
+        Build a FAISS index sized to the corpus.
+
+        Small corpora get an exact IndexFlatL2. Larger corpora get an
+        IVFPQ index (nlist ~ sqrt(n), 8 subquantizers, 8 bits each),
+        which compresses each vector to 8 bytes and probes only a
+        subset of cells per query instead of scanning every vector.
+
+        Args:
+            vectors: float32 array of shape (n, d)
+
+        Returns:
+            Trained FAISS index with all vectors added
+        """
+        n, d = vectors.shape
+
+        if n < self.MIN_IVFPQ_VECTORS:
+            # Exact search over float16-quantized vectors: same recall
+            # in practice, half the index size on disk and in RAM
+            logger.info("Building fp16 flat index (%d vectors)", n)
+            index = faiss.IndexScalarQuantizer(
+                d, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2
+            )
+            index.add(vectors)
+            return index
+
+        nlist = int(math.sqrt(n))
+        logger.info("Building IVFPQ index (%d vectors, nlist=%d)", n, nlist)
+
+        quantizer = faiss.IndexFlatL2(d)
+        index = faiss.IndexIVFPQ(quantizer, d, nlist, 8, 8)
+        index.train(vectors)
+        index.add(vectors)
+
+        # Probe enough cells for good recall at the configured k
+        index.nprobe = min(nlist, max(10, settings.retrieval_k))
+
+        return index
 
     def create_vector_store(self, documents: List[Document]) -> FAISS:
         """
         Create FAISS vector store from documents.
 
+        Embeds all chunks in a single batch, then builds the index
+        manually (see _build_index) instead of relying on the flat
+        index FAISS.from_documents would create.
+
         Args:
             documents: List of document chunks
 
@@ -121,9 +279,20 @@ class RAGPipeline:
         """
         logger.info("Creating vector store...")
 
-        vector_store = FAISS.from_documents(
-            documents=documents,
-            embedding=self.embeddings
+        texts = [doc.page_content for doc in documents]
+        vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+
+        index = self._build_index(vectors)
+
+        doc_ids = [str(uuid4()) for _ in documents]
+        docstore = ArrowDocstore(dict(zip(doc_ids, documents)))
+        index_to_docstore_id = dict(enumerate(doc_ids))
+
+        vector_store = FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id
         )
 
         logger.info("Vector store created successfully")
@@ -142,13 +311,97 @@ class RAGPipeline:
             vector_store = self.vector_store
 
         if path is None:
-            path = settings.vector_store_path
+            path = self.vector_store_path
 
         Path(path).mkdir(parents=True, exist_ok=True)
 
-        vector_store.save_local(path)
+        with self._save_lock:
+            # Identity check against the store's own index: during a
+            # rebuild the fresh store is saved while _shards_index
+            # still belongs to the previous store, and flushing that
+            # stale tier here would persist old vectors into the new
+            # store
+            if self._shards_index is not None and vector_store.index is self._shards_index:
+                # IndexShards isn't serializable: migrate the hot tier
+                # into the cold index and write that, then restore the
+                # tiered wrapper for serving
+                self._flush_hot_tier()
+                vector_store.index = self._cold_index
+                try:
+                    self._atomic_save_local(vector_store, path)
+                finally:
+                    vector_store.index = self._shards_index
+            else:
+                self._atomic_save_local(vector_store, path)
+
+        logger.info("Vector store saved to: %s", path)
+
+    @staticmethod
+    def _atomic_save_local(vector_store: FAISS, path: str):
+        """
+        Write the store to a temp dir, then rename files into place.
+
+        os.replace is atomic, so concurrent writers (e.g. several
+        uvicorn workers saving the same store) can interleave without
+        a reader ever seeing a torn index.faiss or index.pkl.
+
+        Args:
+            vector_store: FAISS vector store to write
+            path: Destination directory
+        """
+        tmp_dir = Path(f"{path}.tmp.{os.getpid()}")
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+
+        vector_store.save_local(str(tmp_dir))
+
+        for name in ("index.faiss", "index.pkl"):
+            os.replace(tmp_dir / name, Path(path) / name)
+        tmp_dir.rmdir()
 
-        logger.info(f"Vector store saved to: {path}")
+    # Seconds a deferred save waits for further changes before writing
+    SAVE_DEBOUNCE_SECONDS = 2.0
+
+    def schedule_save(self):
+        """
+        Persist the vector store soon, coalescing bursts of calls.
+
+        Each call re-arms a short debounce timer, so N uploads in
+        quick succession produce one disk write after the last one
+        instead of N overlapping saves.
+        """
+        with self._save_timer_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(
+                self.SAVE_DEBOUNCE_SECONDS, self._run_scheduled_save
+            )
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _run_scheduled_save(self):
+        """Timer callback for schedule_save."""
+        with self._save_timer_lock:
+            self._save_timer = None
+        try:
+            self.save_vector_store()
+        except Exception:
+            logger.error("Scheduled vector store save failed", exc_info=True)
+
+    def flush_pending_save(self):
+        """
+        Run any debounced save immediately.
+
+        Called at shutdown: the save timer is a daemon thread, so
+        exiting inside the debounce window would otherwise discard
+        changes that /upload already acknowledged.
+        """
+        with self._save_timer_lock:
+            timer = self._save_timer
+            self._save_timer = None
+
+        if timer is not None:
+            timer.cancel()
+            self.save_vector_store()
 
     def load_vector_store(self, path: str = None) -> FAISS:
         """
@@ -161,18 +414,34 @@ class RAGPipeline:
             FAISS vector store
         """
         if path is None:
-            path = settings.vector_store_path
+            path = self.vector_store_path
 
         if not Path(path).exists():
             raise ValueError(f"Vector store path does not exist: {path}")
 
-        vector_store = FAISS.load_local(
-            path,
-            self.embeddings,
-            allow_dangerous_deserialization=True
+        # Memory-map the index so vectors are paged in on demand
+        # instead of copied into RAM up front; fall back to a regular
+        # read for index types that don't support mmap
+        index_file = str(Path(path) / "index.faiss")
+        try:
+            index = faiss.read_index(index_file, faiss.IO_FLAG_MMAP)
+            self._loaded_via_mmap = True
+        except RuntimeError:
+            logger.warning("mmap load not supported for this index, reading into RAM")
+            index = faiss.read_index(index_file)
+            self._loaded_via_mmap = False
+
+        with open(Path(path) / "index.pkl", "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+
+        vector_store = FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id
         )
 
-        logger.info(f"Vector store loaded from: {path}")
+        logger.info("Vector store loaded from: %s", path)
 
         return vector_store
 
@@ -183,46 +452,124 @@ class RAGPipeline:
         Args:
             force_rebuild: Force rebuild of vector store even if it exists
         """
-        vector_store_path = Path(settings.vector_store_path)
+        vector_store_path = Path(self.vector_store_path)
 
         # Check if vector store exists and we're not forcing rebuild
         if vector_store_path.exists() and not force_rebuild:
             logger.info("Loading existing vector store...")
             self.vector_store = self.load_vector_store()
         else:
-            logger.info("Building new vector store...")
-            documents = self.load_documents()
-            chunks = self.split_documents(documents)
-            self.vector_store = self.create_vector_store(chunks)
-            self.save_vector_store()
+            # Cross-process lock: with multiple uvicorn workers, only
+            # one builds the store; the others block here and load
+            # what it wrote
+            with open(f"{self.vector_store_path}.lock", "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    if vector_store_path.exists() and not force_rebuild:
+                        logger.info("Vector store built by another worker, loading...")
+                        self.vector_store = self.load_vector_store()
+                    else:
+                        logger.info("Building new vector store...")
+                        documents = self.load_documents()
+                        chunks = self.split_documents(documents)
+                        self.vector_store = self.create_vector_store(chunks)
+                        self.save_vector_store()
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        self._attach_hot_tier()
 
         # Create QA chain
         self._create_qa_chain()
+        self._clear_answer_cache()
 
-    def _create_qa_chain(self):
-        """Create the question-answering chain."""
-        # Custom prompt template
-        prompt_template = """You are a helpful AI assistant answering questions based on the provided context.
-
-Use the following pieces of context to answer the question at the end. If you don't know the answer based on the context, just say that you don't know. Don't try to make up an answer.
-
-When answering:
-1. Be specific and cite relevant information from the context
-2. Keep your answer concise but complete
-3. If the context mentions specific policies, prices, or procedures, include them in your answer
-
-Context:
-{context}
-
-Question: {question}
-
-Answer:"""
+    def _attach_hot_tier(self):
+        """
+        Put an HNSW "hot" tier in front of an IVFPQ "cold" index.
+
+        IVFPQ handles the bulk corpus compactly but is awkward for
+        incremental adds (vectors get quantized against a fixed
+        codebook trained on the original corpus). When the cold index
+        is IVFPQ, new vectors instead go into an exact in-RAM
+        IndexHNSWFlat, and both tiers are searched together through a
+        faiss.IndexShards. save_vector_store migrates the hot tier
+        into the cold index before writing. Flat and fp16 indices add
+        cheaply in place and get no hot tier.
+        """
+        self._cold_index = None
+        self._cold_index_owner = None
+        self._hot_index = None
+        self._shards_index = None
+
+        # Hold the owning wrapper: the downcast view doesn't keep the
+        # index alive, and IndexShards stores only the raw pointer, so
+        # replacing vector_store.index below would otherwise free the
+        # cold index out from under the shard
+        owner = self.vector_store.index
+        index = faiss.downcast_index(owner)
+
+        if not isinstance(index, faiss.IndexIVFPQ):
+            return
+
+        self._cold_index_owner = owner
+        self._cold_index = index
+        self._hot_index = faiss.IndexHNSWFlat(index.d, 32)
+        self._rebuild_shards()
+
+        logger.info("HNSW hot tier attached over IVFPQ cold index")
+
+    def _rebuild_shards(self):
+        """Recreate the shards wrapper over the current cold and hot indexes."""
+        shards = faiss.IndexShards(self._cold_index.d)
+        shards.add_shard(self._cold_index)
+        shards.add_shard(self._hot_index)
+
+        self._shards_index = shards
+        self.vector_store.index = shards
+
+    def _sync_shards(self):
+        """Refresh the shards wrapper's totals after direct sub-index adds."""
+        sync = getattr(self._shards_index, "syncWithSubIndexes", None)
+        if sync is None:
+            sync = self._shards_index.sync_with_shard_indexes
+        sync()
+
+    def _flush_hot_tier(self):
+        """
+        Migrate hot-tier vectors into the cold IVFPQ index.
 
-        PROMPT = PromptTemplate(
-            template=prompt_template,
-            input_variables=["context", "question"]
-        )
+        Hot vectors sit at global ids after the cold index, so
+        appending them to the cold index and resetting the hot tier
+        preserves every id-to-docstore mapping.
+        """
+        if self._hot_index is None or self._hot_index.ntotal == 0:
+            return
+
+        count = self._hot_index.ntotal
+        vectors = self._hot_index.reconstruct_n(0, count)
+
+        if self._loaded_via_mmap:
+            # A mmap-loaded IVF index has read-only inverted lists and
+            # rejects add(); re-read a writable copy from disk first.
+            # The file still matches the in-RAM cold index because
+            # every save goes through this flush.
+            logger.info("Re-reading cold index without mmap for writable flush")
+            index_file = str(Path(self.vector_store_path) / "index.faiss")
+            # Retain the owning wrapper before downcasting, otherwise
+            # it is collected immediately and the view dangles
+            self._cold_index_owner = faiss.read_index(index_file)
+            self._cold_index = faiss.downcast_index(self._cold_index_owner)
+            self._loaded_via_mmap = False
+            self._rebuild_shards()
+
+        self._cold_index.add(vectors)
+        self._hot_index.reset()
+        self._sync_shards()
+
+        logger.info("Flushed %d vectors from hot tier to cold index", count)
 
+    def _create_qa_chain(self):
+        """Create the question-answering chain."""
         self.qa_chain = RetrievalQA.from_chain_type(
             llm=self.llm,
             chain_type="stuff",
@@ -230,17 +577,54 @@ Answer:"""
                 search_kwargs={"k": settings.retrieval_k}
             ),
             return_source_documents=True,
-            chain_type_kwargs={"prompt": PROMPT}
+            chain_type_kwargs={"prompt": _QA_PROMPT}
         )
 
         logger.info("QA chain created")
 
-    def ask(self, question: str) -> Dict[str, Any]:
+    @staticmethod
+    def _extract_sources(source_docs: List[Document]) -> List[str]:
+        """
+        Unique source filenames for a set of retrieved chunks.
+
+        Includes files recorded in the "sources" metadata, i.e. files
+        whose duplicate copy of a chunk was dropped during dedup.
+
+        Args:
+            source_docs: Retrieved document chunks
+
+        Returns:
+            List of unique source filenames
+        """
+        sources = set()
+        for doc in source_docs:
+            sources.add(os.path.basename(doc.metadata.get("source", "unknown")))
+            for extra in doc.metadata.get("sources", []):
+                sources.add(os.path.basename(extra))
+        return list(sources)
+
+    @staticmethod
+    def _normalize_question(question: str) -> str:
+        """Normalize a question for answer-cache lookups."""
+        return " ".join(question.lower().split())
+
+    def _clear_answer_cache(self):
+        """Drop cached answers (called whenever the index changes)."""
+        with self._answer_cache_lock:
+            self._answer_cache.clear()
+
+    def ask(self, question: str, use_cache: bool = True) -> Dict[str, Any]:
         """
         Ask a question and get an answer with sources.
 
+        Repeated questions (case- and whitespace-insensitive) are
+        served from an LRU cache that is cleared whenever the vector
+        store changes.
+
         Args:
             question: The question to ask
+            use_cache: Serve a cached answer if available; pass False
+                to force a fresh answer (the cache entry is refreshed)
 
         Returns:
             Dictionary containing answer and source documents
@@ -248,37 +632,128 @@ Answer:"""
         if self.qa_chain is None:
             raise ValueError("QA chain not initialized. Call initialize_vector_store() first.")
 
-        logger.info(f"Question: {question}")
+        cache_key = self._normalize_question(question)
+        if use_cache:
+            with self._answer_cache_lock:
+                if cache_key in self._answer_cache:
+                    self._answer_cache.move_to_end(cache_key)
+                    logger.info("Answer cache hit: %s", question)
+                    return self._answer_cache[cache_key]
+
+        logger.info("Question: %s", question)
 
         # Get response from chain
         result = self.qa_chain.invoke({"query": question})
 
         # Extract source file names
         source_docs = result.get("source_documents", [])
-        sources = list(set([
-            os.path.basename(doc.metadata.get("source", "unknown"))
-            for doc in source_docs
-        ]))
+        sources = self._extract_sources(source_docs)
 
         # Extract relevant context snippets
         contexts = [doc.page_content for doc in source_docs]
 
         answer = result.get("result", "")
 
-        logger.info(f"Answer: {answer[:100]}...")
-        logger.info(f"Sources: {sources}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Answer: %s...", answer[:100])
+            logger.info("Sources: %s", sources)
 
-        return {
+        response = {
             "answer": answer,
             "sources": sources,
             "contexts": contexts,
             "source_documents": source_docs
         }
 
+        with self._answer_cache_lock:
+            self._answer_cache[cache_key] = response
+            self._answer_cache.move_to_end(cache_key)
+            while len(self._answer_cache) > settings.answer_cache_size:
+                self._answer_cache.popitem(last=False)
+
+        return response
+
+    def ask_stream(self, question: str) -> Iterator[Dict[str, Any]]:
+        """
+        Ask a question and stream the answer token by token.
+
+        Retrieves context up front, emits a sources event, then yields
+        one event per LLM token so the client sees the first token
+        after retrieval latency instead of after the full generation.
+
+        Args:
+            question: The question to ask
+
+        Yields:
+            Event dicts: {"type": "sources", ...}, then one
+            {"type": "token", ...} per token, then {"type": "done"}
+        """
+        if self.vector_store is None:
+            raise ValueError("Vector store not initialized. Call initialize_vector_store() first.")
+
+        logger.info("Question (stream): %s", question)
+
+        source_docs = self.vector_store.similarity_search(
+            question, k=settings.retrieval_k
+        )
+
+        sources = self._extract_sources(source_docs)
+
+        yield {"type": "sources", "sources": sources}
+
+        context = "\n\n".join(doc.page_content for doc in source_docs)
+        prompt = _QA_PROMPT.format(context=context, question=question)
+
+        for chunk in self.llm.stream(prompt):
+            if chunk.content:
+                yield {"type": "token", "token": chunk.content}
+
+        yield {"type": "done"}
+
+    def _context_automaton(self, contexts: List[str]) -> Optional["ahocorasick.Automaton"]:
+        """
+        Build (or reuse) an Aho-Corasick automaton over context sentences.
+
+        The automaton is cached keyed by the context contents, so
+        repeated calls with the same retrieved chunks skip the rebuild.
+
+        Args:
+            contexts: List of context snippets
+
+        Returns:
+            Automaton over sentences longer than 20 chars, or None if
+            no sentence qualifies
+        """
+        cache_key = tuple(hash(context) for context in contexts)
+        if self._automaton_cache is not None and self._automaton_cache[0] == cache_key:
+            return self._automaton_cache[1]
+
+        sentences = set()
+        for context in contexts:
+            for sentence in _SENTENCE_SPLIT_RE.split(context):
+                clean_sentence = sentence.strip()
+                if len(clean_sentence) > 20:
+                    sentences.add(clean_sentence)
+
+        automaton = None
+        if sentences:
+            automaton = ahocorasick.Automaton()
+            for sentence in sentences:
+                automaton.add_word(sentence, sentence)
+            automaton.make_automaton()
+
+        self._automaton_cache = (cache_key, automaton)
+
+        return automaton
+
     def highlight_context(self, answer: str, contexts: List[str]) -> str:
         """
         Highlight matched context in the answer (bonus feature).
 
+        Scans the answer once with an Aho-Corasick automaton built
+        over the context sentences, instead of a substring check per
+        sentence, so cost is linear in the answer length.
+
         Args:
             answer: The generated answer
             contexts: List of context snippets
@@ -286,53 +761,96 @@ Answer:"""
         Returns:
             Answer with highlighted context
         """
-        # Find sentences from contexts that appear in the answer
-        highlighted_answer = answer
+        automaton = self._context_automaton(contexts)
 
-        for context in contexts:
-            # Split context into sentences
-            sentences = re.split(r'(?<=[.!?])\s+', context)
+        if automaton is None:
+            return answer
 
-            for sentence in sentences:
-                # Clean sentence
-                clean_sentence = sentence.strip()
+        spans = []
+        for end, sentence in automaton.iter(answer):
+            start = end - len(sentence) + 1
+            spans.append((start, end + 1, sentence))
+
+        if not spans:
+            return answer
 
-                if len(clean_sentence) > 20 and clean_sentence in answer:
-                    # Add markdown bold highlighting
-                    highlighted_answer = highlighted_answer.replace(
-                        clean_sentence,
-                        f"**{clean_sentence}**"
-                    )
+        # Keep non-overlapping matches, preferring the longest at each start
+        spans.sort(key=lambda span: (span[0], span[0] - span[1]))
 
-        return highlighted_answer
+        pieces = []
+        previous_end = 0
+        for start, end, sentence in spans:
+            if start < previous_end:
+                continue
+            pieces.append(answer[previous_end:start])
+            pieces.append(f"**{sentence}**")
+            previous_end = end
+        pieces.append(answer[previous_end:])
 
-    def add_documents(self, file_paths: List[str]):
+        return "".join(pieces)
+
+    def _add_chunks(self, chunks: List[Document]):
+        """
+        Add chunks to the vector store, routing through the hot tier.
+
+        With tiering active, new vectors land in the exact HNSW hot
+        index (no PQ quantization loss, no retraining) and the
+        docstore bookkeeping is updated to match their global ids.
+        Without tiering this is a plain add_documents.
+
+        Args:
+            chunks: Document chunks to add
+        """
+        if self._hot_index is None:
+            self.vector_store.add_documents(chunks)
+            return
+
+        vectors = np.asarray(
+            self.embeddings.embed_documents([chunk.page_content for chunk in chunks]),
+            dtype=np.float32
+        )
+
+        # Take the save lock so ids aren't computed mid-flush while a
+        # save is migrating the hot tier into the cold index
+        with self._save_lock:
+            # Hot vectors get global ids after everything already indexed
+            start = self._cold_index.ntotal + self._hot_index.ntotal
+
+            self._hot_index.add(vectors)
+            self._sync_shards()
+
+            doc_ids = [str(uuid4()) for _ in chunks]
+            self.vector_store.docstore.add(dict(zip(doc_ids, chunks)))
+            for offset, doc_id in enumerate(doc_ids):
+                self.vector_store.index_to_docstore_id[start + offset] = doc_id
+
+        logger.info("Added %d chunks to hot tier", len(chunks))
+
+    def add_documents(self, file_paths: List[str], save: bool = True):
         """
         Add new documents to existing vector store (bonus feature).
 
         Args:
             file_paths: List of file paths to add
+            save: Persist the vector store after adding; pass False to
+                defer the disk write (e.g. to a background task)
         """
         if self.vector_store is None:
             raise ValueError("Vector store not initialized")
 
-        logger.info(f"Adding {len(file_paths)} new documents...")
+        logger.info("Adding %d new documents...", len(file_paths))
 
-        # Load new documents
-        new_docs = []
-        for file_path in file_paths:
-            loader = TextLoader(file_path, encoding="utf-8")
-            docs = loader.load()
-            new_docs.extend(docs)
+        # Load new documents concurrently, same as load_documents
+        new_docs = self._load_files(file_paths)
 
-        # Split into chunks
+        # Split into chunks and add them in a single batched call
         chunks = self.split_documents(new_docs)
 
-        # Add to existing vector store
-        self.vector_store.add_documents(chunks)
+        self._add_chunks(chunks)
+        self._clear_answer_cache()
 
-        # Save updated vector store
-        self.save_vector_store()
+        if save:
+            self.save_vector_store()
 
         logger.info("Documents added successfully")
 